@@ -1,13 +1,36 @@
+import contextlib
 import csv
+import itertools
 import json
 import os
+import queue
+import shutil
+import threading
 import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, NamedTuple, Optional, Union
+from urllib.parse import urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
 from tqdm import tqdm
+from urllib3.exceptions import ProtocolError
+from urllib3.exceptions import TimeoutError as Urllib3TimeoutError
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # optional speedup; fall back to the stdlib json module
+    orjson = None
 
 
 """
@@ -25,81 +48,613 @@ You can override the Grobid URL with the GROBID_URL environment variable, e.g.:
 """
 
 
-GROBID_URL = os.environ.get("GROBID_URL", "http://localhost:8070")
-# Optional throttle between Grobid calls (in seconds)
-GROBID_SLEEP = float(os.environ.get("GROBID_SLEEP", "0.2"))
-# Optional batch control: process only a slice of the CSV
-BATCH_START = int(os.environ.get("GROBID_BATCH_START", "0"))  # 0-based index
-BATCH_SIZE = os.environ.get("GROBID_BATCH_SIZE")
-if BATCH_SIZE is not None:
-    BATCH_SIZE = int(BATCH_SIZE)
+@dataclass(frozen=True, slots=True)
+class Config:
+    """
+    Tuning knobs for one run, read once from the environment in main().
+
+    See Config.from_env for the environment variable behind each field.
+    """
+
+    grobid_url: str
+    # Parallel Grobid calls; keep at or below the server's `concurrency` setting
+    grobid_workers: int
+    # Optional minimum spacing between the starts of Grobid calls (in seconds)
+    grobid_sleep: float
+    # Re-send papers to Grobid even if their last failure looked permanent
+    grobid_retry_all: bool
+    # Re-check cached TEI files for truncation even if an earlier run already
+    # verified this output folder (see TEI_VERIFIED_MARKER)
+    verify_tei: bool
+    # Optional batch control: process only a slice of the CSV
+    batch_start: int  # 0-based index
+    batch_size: Optional[int]
+    # Parallel downloads: total worker threads and max in-flight requests per host
+    dl_workers: int
+    dl_per_host: int
+    # Max downloaded-but-not-yet-parsed rows buffered between the two stages
+    queue_size: int
+    # Derived once here rather than rebuilt on every Grobid call
+    grobid_process_url: str = field(init=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(
+            self,
+            "grobid_process_url",
+            f"{self.grobid_url.rstrip('/')}/api/processFulltextDocument",
+        )
+
+    @classmethod
+    def from_env(cls) -> "Config":
+        batch_size = os.environ.get("GROBID_BATCH_SIZE")
+        return cls(
+            grobid_url=os.environ.get("GROBID_URL", "http://localhost:8070"),
+            grobid_workers=int(os.environ.get("GROBID_WORKERS", "10")),
+            # Off by default: the server signals overload with 503/429 +
+            # Retry-After, which the session's Retry policy already waits on.
+            grobid_sleep=float(os.environ.get("GROBID_SLEEP", "0.0")),
+            grobid_retry_all=os.environ.get("GROBID_RETRY_ALL", "0") == "1",
+            verify_tei=os.environ.get("GROBID_VERIFY_TEI", "0") == "1",
+            batch_start=int(os.environ.get("GROBID_BATCH_START", "0")),
+            batch_size=int(batch_size) if batch_size is not None else None,
+            dl_workers=int(os.environ.get("DL_WORKERS", "16")),
+            dl_per_host=int(os.environ.get("DL_PER_HOST", "8")),
+            queue_size=int(os.environ.get("PIPELINE_QUEUE_SIZE", "64")),
+        )
+
 
 THIS_DIR = Path(__file__).resolve().parent
 REPO_ROOT = THIS_DIR.parent
 
 CSV_PATH = THIS_DIR / "2025_iclr_pdfs_urls.csv"
 OUTPUT_ROOT = REPO_ROOT / "ICLR2025_papers"
+# Per-paper paths are built as plain strings in the per-row hot path
+_OUTPUT_ROOT_STR = str(OUTPUT_ROOT)
+# Written after the cached TEI files have been checked for truncation once.
+# New TEI files are saved atomically, so later runs can skip the check.
+TEI_VERIFIED_MARKER = OUTPUT_ROOT / ".tei_verified"
+
+# Fixed parts of every Grobid request, built once rather than per call.
+# Form values are strings so requests sends them as-is.
+_GROBID_FIELDS = {
+    # Basic, safe defaults; tune if needed
+    "consolidateHeader": "1",
+    "consolidateCitations": "0",
+}
+_PDF_CONTENT_TYPE = "application/pdf"
+
+# Progress bars are updated from many threads; use the overall average rate
+# and redraw at most once a second so refreshing doesn't compete for the GIL.
+_PBAR_OPTIONS = {"smoothing": 0, "mininterval": 1.0}
+
+# Leading CSV rows scanned for PDF hosts to warm up before the fan-out
+_WARMUP_ROWS = 32
+
+# Block size for streaming PDF bodies to disk
+DOWNLOAD_CHUNK_SIZE = 1 << 18  # 256 KiB
+
+# PDF downloads and Grobid calls share one session so they reuse keep-alive
+# connections instead of paying a fresh TCP/TLS handshake per paper. Retries
+# are handled by urllib3: exponential backoff, and on 429/503 the server's
+# Retry-After wait is honoured, so Grobid's own overload signal paces the
+# workers.
+_RETRY = Retry(
+    total=5,
+    backoff_factor=1,
+    status_forcelist=[408, 429, 500, 502, 503, 504],
+    allowed_methods=["GET", "POST"],
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+
+def build_session(cfg: Config) -> requests.Session:
+    """Create the pooled, retrying session shared by all worker threads."""
+    # urllib3 keeps one pool per host, so pool_maxsize acts as a per-host
+    # keep-alive limit, sized to the most requests in flight to one PDF origin.
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=cfg.dl_per_host,
+        max_retries=_RETRY,
+    )
+    # Grobid gets its own adapter (requests picks the longest matching mount
+    # prefix): exactly one persistent connection per Grobid worker, and
+    # pool_block so the client can never open more sockets than that against
+    # the server, even if a caller oversubscribes.
+    grobid_adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=cfg.grobid_workers,
+        pool_block=True,
+        max_retries=_RETRY,
+    )
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.mount(cfg.grobid_url.rstrip("/") + "/", grobid_adapter)
+    return session
+
+
+@contextlib.contextmanager
+def _retries_disabled(session: requests.Session) -> Iterator[None]:
+    """
+    Switch off the session's Retry policy for start-up probes.
 
+    Probes still go through the session's own connection pools (so they warm
+    them), but fail after a single attempt. Only use this before worker
+    threads start: it temporarily changes the shared adapters.
+    """
+    adapters = list(session.adapters.values())
+    saved = [adapter.max_retries for adapter in adapters]
+    for adapter in adapters:
+        # The same "no retries" policy requests uses by default
+        adapter.max_retries = Retry(0, read=False)
+    try:
+        yield
+    finally:
+        for adapter, retries in zip(adapters, saved):
+            adapter.max_retries = retries
+
+
+# Per-host semaphores so parallel downloads stay polite to each origin server
+_HOST_SEMAPHORES: dict[str, threading.Semaphore] = {}
+_HOST_SEMAPHORES_LOCK = threading.Lock()
+
+
+def _host_semaphore(url: str, limit: int) -> threading.Semaphore:
+    """Return the shared semaphore limiting concurrent requests to url's host."""
+    host = urlparse(url).netloc
+    with _HOST_SEMAPHORES_LOCK:
+        if host not in _HOST_SEMAPHORES:
+            _HOST_SEMAPHORES[host] = threading.Semaphore(limit)
+        return _HOST_SEMAPHORES[host]
+
+
+# Shared throttle so GROBID_SLEEP spaces out call starts across all workers
+# without parking each worker thread for the full sleep after every call.
+_GROBID_THROTTLE_LOCK = threading.Lock()
+_grobid_next_call = 0.0
+
+
+def _grobid_throttle(interval: float) -> None:
+    """Block until at least interval seconds have passed since the last call."""
+    global _grobid_next_call
+    if interval <= 0:
+        return
+    with _GROBID_THROTTLE_LOCK:
+        now = time.monotonic()
+        delay = _grobid_next_call - now
+        _grobid_next_call = max(now, _grobid_next_call) + interval
+    if delay > 0:
+        time.sleep(delay)
+
+
+def _expected_size(resp: requests.Response) -> Optional[int]:
+    """Return the full size of the file being served, if the server says."""
+    if resp.status_code == 206:
+        # Content-Range: bytes <start>-<end>/<total>  (total may be "*")
+        total = resp.headers.get("Content-Range", "").rpartition("/")[2]
+    else:
+        total = resp.headers.get("Content-Length", "")
+    return int(total) if total.isdigit() else None
 
-def download_pdf(url: str, dest_path: Path, timeout: int = 120) -> None:
-    """Download a single PDF to dest_path."""
-    dest_path.parent.mkdir(parents=True, exist_ok=True)
 
-    resp = requests.get(url, stream=True, timeout=timeout)
-    resp.raise_for_status()
+def download_pdf(
+    session: requests.Session, url: str, dest_path: str, timeout: int = 120
+) -> None:
+    """
+    Download a single PDF to dest_path.
+
+    The body is streamed into a sibling ``.part`` file and only renamed to
+    dest_path once its size matches what the server advertised, so an
+    interrupted run never leaves a truncated PDF behind that later runs would
+    mistake for a finished download. A leftover ``.part`` file is resumed
+    with a Range request when the server supports it.
+    """
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    part_path = f"{dest_path}.part"
+
+    try:
+        have = os.path.getsize(part_path)
+    except FileNotFoundError:
+        have = 0
+    # Ask for the raw bytes so sizes on disk are comparable to Content-Length
+    headers = {"Accept-Encoding": "identity"}
+    if have:
+        headers["Range"] = f"bytes={have}-"
+
+    with session.get(url, headers=headers, stream=True, timeout=timeout) as resp:
+        if resp.status_code == 416:
+            # Leftover .part is unusable for this Range; start over
+            os.remove(part_path)
+            return download_pdf(session, url, dest_path, timeout=timeout)
+        resp.raise_for_status()
+
+        # 206 means the server honoured our Range; anything else is a full body
+        mode = "ab" if resp.status_code == 206 else "wb"
+        expected = _expected_size(resp)
+        # Let urllib3 undo any Content-Encoding, then copy in large C-level
+        # blocks rather than looping over small chunks in Python.
+        resp.raw.decode_content = True
+        with open(part_path, mode) as f:
+            shutil.copyfileobj(resp.raw, f, length=DOWNLOAD_CHUNK_SIZE)
+
+    got = os.path.getsize(part_path)
+    if expected is not None and got != expected:
+        # Keep the .part file so the next run can resume from here
+        raise IOError(f"Incomplete download: got {got} of {expected} bytes")
+
+    os.replace(part_path, dest_path)
+
+
+def _tei_complete(tei_path: str) -> bool:
+    """Return True if tei_path holds a full TEI document (not a partial write)."""
+    try:
+        with open(tei_path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - 256))
+            tail = f.read()
+    except FileNotFoundError:
+        return False
+    return size > 0 and b"</TEI>" in tail
+
+
+def check_grobid_alive(
+    session: requests.Session, cfg: Config, timeout: int = 10
+) -> None:
+    """
+    Fail fast if the Grobid server is not up, before any PDF is sent.
+
+    Mirrors the server check grobid_client_python runs ahead of a batch, so a
+    missing server is one clear error instead of a parse failure per paper.
+    Sent without retries, so it gives up after about `timeout` seconds.
+    """
+    url = f"{cfg.grobid_url.rstrip('/')}/api/isalive"
+    try:
+        with _retries_disabled(session):
+            resp = session.get(url, timeout=timeout)
+        resp.raise_for_status()
+    except RequestException as e:
+        raise RuntimeError(f"Grobid server not reachable at {cfg.grobid_url}") from e
+
+
+def warm_connections(
+    session: requests.Session, rows: Iterable[dict], timeout: int = 5
+) -> None:
+    """
+    Open a keep-alive connection to each PDF host seen in rows.
+
+    DNS lookup and the TCP/TLS handshake then happen once per host up front,
+    instead of as a burst when every download worker starts at the same time.
+    Hosts are probed concurrently and without retries, so a dead host costs
+    about one `timeout` in total. The Grobid host is already warmed by
+    check_grobid_alive.
+    """
+    origins = set()
+    for row in rows:
+        parsed = urlparse(str(row.get("pdf_url") or "").strip())
+        if parsed.scheme and parsed.netloc:
+            origins.add(f"{parsed.scheme}://{parsed.netloc}/")
+    if not origins:
+        return
+
+    def probe(origin: str) -> None:
+        try:
+            session.head(origin, timeout=timeout)
+        except RequestException:
+            pass  # best effort only; the real downloads retry on their own
 
-    with open(dest_path, "wb") as f:
-        for chunk in resp.iter_content(chunk_size=8192):
-            if chunk:
-                f.write(chunk)
+    with _retries_disabled(session), ThreadPoolExecutor(
+        max_workers=len(origins)
+    ) as ex:
+        list(ex.map(probe, origins))
 
 
 def grobid_process_fulltext(
-    pdf_path: Path,
-    output_xml_path: Path,
-    *,
-    retries: int = 3,
-    backoff: float = 5.0,
+    session: requests.Session, cfg: Config, pdf_path: str, output_xml_path: str
 ) -> None:
     """
     Send the PDF to Grobid's processFulltextDocument endpoint and save TEI XML.
 
-    Assumes a Grobid server is running and accessible at GROBID_URL.
+    Assumes a Grobid server is running and accessible at cfg.grobid_url.
+    Transient failures are retried by the session's urllib3 Retry policy.
     """
-    url = f"{GROBID_URL.rstrip('/')}/api/processFulltextDocument"
-    output_xml_path.parent.mkdir(parents=True, exist_ok=True)
+    os.makedirs(os.path.dirname(output_xml_path), exist_ok=True)
+
+    # Read the PDF once; urllib3 resends these same bytes on a retry instead
+    # of going back to disk.
+    with open(pdf_path, "rb") as f:
+        pdf_bytes = f.read()
+    files = {"input": (os.path.basename(pdf_path), pdf_bytes, _PDF_CONTENT_TYPE)}
+    resp = session.post(
+        cfg.grobid_process_url, files=files, data=_GROBID_FIELDS, timeout=300
+    )
+    resp.raise_for_status()
 
-    last_err: Optional[Exception] = None
+    # Work on the raw bytes: TEI is UTF-8 already, so decoding to str and
+    # re-encoding on write would only cost time.
+    content = resp.content.strip()
+    # Basic sanity check: Grobid should return a TEI XML document
+    if not content or b"<TEI" not in content:
+        raise ValueError("Grobid returned empty or non-TEI response")
+
+    # Write via a temp file + rename so a crash never leaves a partial TEI
+    part_path = f"{output_xml_path}.part"
+    with open(part_path, "wb") as f:
+        f.write(content)
+    os.replace(part_path, output_xml_path)
+
+
+# HTTP statuses worth another Grobid attempt on a later run
+_RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+def _error_record(
+    kind: str, url: Optional[str], msg: str = "", status: Optional[int] = None
+) -> dict:
+    """Build a structured error entry for grobid_errors.json."""
+    return {"type": kind, "status": status, "url": url, "msg": msg or kind}
+
+
+def _classify(exc: Exception, url: str) -> dict:
+    """Turn an exception into an error record that keeps type and HTTP status."""
+    if isinstance(exc, requests.HTTPError):
+        status = exc.response.status_code if exc.response is not None else None
+        return _error_record("http_error", url, str(exc), status)
+    # Timeout before ConnectionError: ConnectTimeout is both. Reading
+    # resp.raw directly (download_pdf) raises urllib3's own exceptions, which
+    # requests does not wrap, so match those too.
+    if isinstance(exc, (requests.Timeout, Urllib3TimeoutError)):
+        return _error_record("timeout", url, str(exc))
+    if isinstance(exc, (requests.ConnectionError, ProtocolError)):
+        return _error_record("connection_error", url, str(exc))
+    return _error_record(type(exc).__name__, url, str(exc))
+
+
+def _is_retryable(record: object) -> bool:
+    """Return True unless a previous parse error would just happen again."""
+    if not isinstance(record, dict):
+        # Entries from older logs were plain repr() strings; try them again
+        return True
+    if record.get("type") == "http_error":
+        return record.get("status") in _RETRYABLE_STATUSES
+    # Grobid answered, but not with TEI: the PDF itself is the problem
+    return record.get("type") != "ValueError"
+
+
+def load_permanent_parse_errors(error_log_path: Path) -> dict[str, dict]:
+    """
+    Map paper_id -> error record for parse failures in a previous error log
+    that are not worth retrying (e.g. HTTP 400 or a non-TEI response).
+    """
+    if not error_log_path.exists():
+        return {}
+    previous = json.loads(error_log_path.read_bytes())
+    return {
+        paper_id: record
+        for _, paper_id, record in previous.get("parse_errors", [])
+        if paper_id and not _is_retryable(record)
+    }
 
-    for attempt in range(1, retries + 1):
-        try:
-            with open(pdf_path, "rb") as f:
-                files = {"input": (pdf_path.name, f, "application/pdf")}
-                data = {
-                    # Basic, safe defaults; tune if needed
-                    "consolidateHeader": 1,
-                    "consolidateCitations": 0,
-                }
-                resp = requests.post(url, files=files, data=data, timeout=300)
 
-            resp.raise_for_status()
+def paper_paths(folder_name: str) -> tuple[str, str, str]:
+    """Return (pdf_path, tei_path, meta_path) for a paper folder, as strings."""
+    paper_dir = os.path.join(_OUTPUT_ROOT_STR, folder_name)
+    return (
+        os.path.join(paper_dir, f"{folder_name}.pdf"),
+        os.path.join(paper_dir, f"{folder_name}.tei.xml"),
+        os.path.join(paper_dir, "meta.json"),
+    )
 
-            text = resp.text.strip()
-            # Basic sanity check: Grobid should return a TEI XML document
-            if not text or "<TEI" not in text:
-                raise ValueError("Grobid returned empty or non-TEI response")
 
-            with open(output_xml_path, "w", encoding="utf-8") as out_f:
-                out_f.write(text)
+class CompletedOutputs(NamedTuple):
+    """Folder names under OUTPUT_ROOT that already hold each output file."""
 
-            return
+    pdf: set[str]
+    tei: set[str]
+    meta: set[str]
+
+
+def scan_completed(verify_tei: bool = False) -> CompletedOutputs:
+    """
+    Walk OUTPUT_ROOT once and record which papers already have outputs.
+
+    One scandir/listdir per folder replaces three exists() stat calls per
+    row, which dominates start-up time when resuming a large run. TEI files
+    are written atomically, so their presence is trusted; verify_tei also
+    reads the tail of each one and deletes partial files left by older runs,
+    so they are parsed again.
+    """
+    done = CompletedOutputs(set(), set(), set())
+    with os.scandir(OUTPUT_ROOT) as entries:
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+            folder_name = entry.name
+            names = set(os.listdir(entry.path))
+            if f"{folder_name}.pdf" in names:
+                done.pdf.add(folder_name)
+            tei_name = f"{folder_name}.tei.xml"
+            if tei_name in names:
+                tei_path = os.path.join(entry.path, tei_name)
+                if not verify_tei or _tei_complete(tei_path):
+                    done.tei.add(folder_name)
+                else:
+                    os.remove(tei_path)
+            if "meta.json" in names:
+                done.meta.add(folder_name)
+    return done
+
+
+def _download_one(
+    session: requests.Session, cfg: Config, row: dict, done: CompletedOutputs
+) -> tuple[str, Optional[dict]]:
+    """
+    Download the PDF for a single CSV row if it is not already on disk.
+
+    Returns (paper_id, error) where error is None on success.
+    """
+    paper_id = str(row.get("paper_id") or "").strip()
+    forum = str(row.get("forum") or "").strip()
+    pdf_url = str(row.get("pdf_url") or "").strip()
+
+    if not pdf_url:
+        return paper_id, _error_record("missing_pdf_url", None)
+
+    folder_name = paper_id or forum
+    if not folder_name:
+        return paper_id, _error_record("missing_ids", pdf_url)
+
+    pdf_path, _, _ = paper_paths(folder_name)
+
+    try:
+        if folder_name not in done.pdf:
+            with _host_semaphore(pdf_url, cfg.dl_per_host):
+                download_pdf(session, pdf_url, pdf_path)
+    except Exception as e:  # noqa: BLE001
+        return paper_id, _classify(e, pdf_url)
+
+    return paper_id, None
+
+
+def _grobid_one(
+    session: requests.Session,
+    cfg: Config,
+    row: dict,
+    pdf_ready: bool,
+    done: CompletedOutputs,
+    permanent_errors: dict[str, dict],
+) -> tuple[str, Optional[dict]]:
+    """
+    Run Grobid and write metadata for a single CSV row, skipping cached outputs.
+
+    pdf_ready tells whether the download stage has the PDF on disk; papers in
+    permanent_errors are not re-sent to Grobid and keep their old error.
+    Returns (paper_id, error) where error is None on success.
+    """
+    paper_id = str(row.get("paper_id") or "").strip()
+    forum = str(row.get("forum") or "").strip()
+    title = str(row.get("title") or "").strip()
+    pdf_url = str(row.get("pdf_url") or "").strip()
+
+    folder_name = paper_id or forum
+    if not folder_name:
+        return paper_id, _error_record("missing_ids", pdf_url or None)
+
+    pdf_path, tei_path, meta_path = paper_paths(folder_name)
+
+    if not pdf_ready:
+        return paper_id, _error_record("pdf_not_downloaded", pdf_url or None)
+
+    try:
+        if folder_name not in done.tei:
+            if paper_id in permanent_errors:
+                return paper_id, permanent_errors[paper_id]
+            _grobid_throttle(cfg.grobid_sleep)
+            grobid_process_fulltext(session, cfg, pdf_path, tei_path)
+
+        if folder_name not in done.meta:
+            meta = {
+                "paper_id": paper_id,
+                "forum": forum,
+                "title": safe_title(title),
+                "pdf_url": pdf_url,
+            }
+            write_json(meta_path, meta)
+    except Exception as e:  # noqa: BLE001
+        return paper_id, _classify(e, cfg.grobid_process_url)
 
-        except RequestException as e:
-            last_err = e
-            if attempt < retries:
-                time.sleep(backoff * attempt)
-            else:
-                raise
+    return paper_id, None
+
+
+# Marks the end of the download stage for Grobid consumer threads
+_END_OF_ROWS = None
+
+# (row index, CSV row, PDF on disk?) handed from the download to the parse stage
+_PipelineItem = Optional[tuple[int, dict, bool]]
+
+
+def _download_stage(
+    session: requests.Session,
+    cfg: Config,
+    idx: int,
+    row: dict,
+    done: CompletedOutputs,
+    pdf_queue: queue.Queue[_PipelineItem],
+) -> tuple[str, Optional[dict]]:
+    """Download one row's PDF, then hand the row on to the Grobid stage."""
+    err: Optional[dict] = _error_record("download_not_finished", None)
+    try:
+        paper_id, err = _download_one(session, cfg, row, done)
+        return paper_id, err
+    finally:
+        # Always forward the row, so a failed download is still reported by
+        # the parse stage as pdf_not_downloaded (as in the sequential version).
+        pdf_queue.put((idx, row, err is None))
+
+
+def _grobid_consumer(
+    session: requests.Session,
+    cfg: Config,
+    pdf_queue: queue.Queue[_PipelineItem],
+    done: CompletedOutputs,
+    permanent_errors: dict[str, dict],
+    errors_parse: list[tuple[int, str, dict]],
+    pbar: tqdm,
+    stop: threading.Event,
+) -> None:
+    """
+    Parse rows from pdf_queue until the end-of-rows sentinel arrives.
+
+    Once stop is set (the run was interrupted), remaining rows are drained
+    without being parsed so producers blocked on the queue can finish.
+    """
+    while True:
+        item = pdf_queue.get()
+        if item is _END_OF_ROWS:
+            return
+        if stop.is_set():
+            continue
+        idx, row, pdf_ready = item
+        # One bad row must not kill the worker: with every consumer gone the
+        # downloaders would block forever on the full queue.
+        try:
+            paper_id, err = _grobid_one(
+                session, cfg, row, pdf_ready, done, permanent_errors
+            )
+        except Exception as e:  # noqa: BLE001
+            paper_id = str(row.get("paper_id") or "").strip()
+            err = _classify(e, cfg.grobid_process_url)
+        finally:
+            pbar.update(1)
+        if err is not None:
+            # list.append is atomic under the GIL, so no extra lock is needed
+            errors_parse.append((idx, paper_id, err))
+
+
+def _record_download(
+    fut: Future,
+    pending: dict[Future, int],
+    errors_download: list[tuple[int, str, dict]],
+    pbar: tqdm,
+) -> None:
+    """Collect a finished download task and drop it from the pending window."""
+    idx = pending.pop(fut)
+    paper_id, err = fut.result()
+    if err is not None:
+        errors_download.append((idx, paper_id, err))
+    pbar.update(1)
+
+
+def write_json(path: Union[str, Path], obj: object) -> None:
+    """Write obj to path as indented UTF-8 JSON, using orjson when installed."""
+    if orjson is not None:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    else:
+        data = json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(data)
 
 
 def safe_title(raw_title: str) -> str:
@@ -108,7 +663,7 @@ def safe_title(raw_title: str) -> str:
     return raw_title.strip()
 
 
-def process_row(row: dict) -> Optional[str]:
+def process_row(session: requests.Session, cfg: Config, row: dict) -> Optional[str]:
     """
     Process a single CSV row: download PDF and run Grobid.
 
@@ -127,30 +682,26 @@ def process_row(row: dict) -> Optional[str]:
     if not folder_name:
         return "missing_ids"
 
-    paper_dir = OUTPUT_ROOT / folder_name
-    pdf_path = paper_dir / f"{folder_name}.pdf"
-    tei_path = paper_dir / f"{folder_name}.tei.xml"
-    meta_path = paper_dir / "meta.json"
+    pdf_path, tei_path, meta_path = paper_paths(folder_name)
 
     try:
         # Download PDF if needed
-        if not pdf_path.exists():
-            download_pdf(pdf_url, pdf_path)
+        if not os.path.exists(pdf_path):
+            download_pdf(session, pdf_url, pdf_path)
 
         # Run Grobid if needed
-        if not tei_path.exists():
-            grobid_process_fulltext(pdf_path, tei_path)
+        if not _tei_complete(tei_path):
+            grobid_process_fulltext(session, cfg, pdf_path, tei_path)
 
         # Save simple metadata alongside
-        if not meta_path.exists():
+        if not os.path.exists(meta_path):
             meta = {
                 "paper_id": paper_id,
                 "forum": forum,
                 "title": safe_title(title),
                 "pdf_url": pdf_url,
             }
-            with open(meta_path, "w", encoding="utf-8") as f:
-                json.dump(meta, f, ensure_ascii=False, indent=2)
+            write_json(meta_path, meta)
 
         return None
 
@@ -158,111 +709,170 @@ def process_row(row: dict) -> Optional[str]:
         return repr(e)
 
 
-def main() -> None:
-    if not CSV_PATH.exists():
-        raise FileNotFoundError(f"CSV not found at {CSV_PATH}")
+def error_log_name(cfg: Config) -> str:
+    """Error log file name; batched runs get their own so shards don't clash."""
+    if cfg.batch_size is None:
+        return "grobid_errors.json"
+    return f"grobid_errors_{cfg.batch_start}_{cfg.batch_start + cfg.batch_size}.json"
 
-    OUTPUT_ROOT.mkdir(parents=True, exist_ok=True)
 
-    print(f"Using Grobid at: {GROBID_URL}")
-    print(f"Grobid sleep between calls: {GROBID_SLEEP} seconds")
-    print(f"Reading URLs from: {CSV_PATH}")
-    print(f"Writing per-paper folders under: {OUTPUT_ROOT}")
+def _count_rows() -> int:
+    """
+    Count data rows in the CSV without building per-row dicts.
+
+    launch_shards.count_rows() uses the same logic to pick shard boundaries;
+    keep the two in sync.
+    """
+    with open(CSV_PATH, newline="", encoding="utf-8") as f:
+        return max(0, sum(1 for _ in csv.reader(f)) - 1)
 
-    errors_download: list[tuple[int, str, str]] = []
-    errors_parse: list[tuple[int, str, str]] = []
 
+def _iter_rows(cfg: Config) -> Iterator[dict]:
+    """Yield CSV rows lazily, restricted to the configured batch if any."""
     with open(CSV_PATH, newline="", encoding="utf-8") as f:
-        all_rows = list(csv.DictReader(f))
+        reader = csv.DictReader(f)
+        if cfg.batch_size is not None:
+            end = cfg.batch_start + cfg.batch_size
+            yield from itertools.islice(reader, cfg.batch_start, end)
+        else:
+            yield from reader
 
-    # Optionally restrict to a batch (useful for debugging or chunked runs)
-    if BATCH_SIZE is not None:
-        end = BATCH_START + BATCH_SIZE
-        rows = all_rows[BATCH_START:end]
-        print(f"Processing batch rows [{BATCH_START}:{end}] (total {len(rows)})")
-    else:
-        rows = all_rows
 
-    # First pass: download all PDFs
-    for idx, row in enumerate(tqdm(rows, desc="Downloading PDFs"), start=1):
-        paper_id = str(row.get("paper_id") or "").strip()
-        forum = str(row.get("forum") or "").strip()
-        pdf_url = str(row.get("pdf_url") or "").strip()
+def main() -> None:
+    if not CSV_PATH.exists():
+        raise FileNotFoundError(f"CSV not found at {CSV_PATH}")
 
-        if not pdf_url:
-            errors_download.append((idx, paper_id, "missing_pdf_url"))
-            continue
+    OUTPUT_ROOT.mkdir(parents=True, exist_ok=True)
 
-        folder_name = paper_id or forum
-        if not folder_name:
-            errors_download.append((idx, paper_id, "missing_ids"))
-            continue
+    cfg = Config.from_env()
+    session = build_session(cfg)
 
-        paper_dir = OUTPUT_ROOT / folder_name
-        pdf_path = paper_dir / f"{folder_name}.pdf"
+    print(f"Using Grobid at: {cfg.grobid_url}")
+    check_grobid_alive(session, cfg)
+    print(f"Grobid workers: {cfg.grobid_workers}")
+    print(f"Grobid sleep between calls: {cfg.grobid_sleep} seconds")
+    print(f"Reading URLs from: {CSV_PATH}")
+    print(f"Writing per-paper folders under: {OUTPUT_ROOT}")
 
-        try:
-            if not pdf_path.exists():
-                download_pdf(pdf_url, pdf_path)
-        except Exception as e:  # noqa: BLE001
-            errors_download.append((idx, paper_id, repr(e)))
-
-    # Second pass: run Grobid + write metadata
-    for idx, row in enumerate(tqdm(rows, desc="Parsing PDFs with Grobid"), start=1):
-        paper_id = str(row.get("paper_id") or "").strip()
-        forum = str(row.get("forum") or "").strip()
-        title = str(row.get("title") or "").strip()
-        pdf_url = str(row.get("pdf_url") or "").strip()
-
-        folder_name = paper_id or forum
-        if not folder_name:
-            errors_parse.append((idx, paper_id, "missing_ids"))
-            continue
+    errors_download: list[tuple[int, str, dict]] = []
+    errors_parse: list[tuple[int, str, dict]] = []
 
-        paper_dir = OUTPUT_ROOT / folder_name
-        pdf_path = paper_dir / f"{folder_name}.pdf"
-        tei_path = paper_dir / f"{folder_name}.tei.xml"
-        meta_path = paper_dir / "meta.json"
+    # Rows are streamed from the CSV as they are submitted rather than
+    # materialized up front; only the row count is needed ahead of time.
+    total_rows = _count_rows()
 
-        if not pdf_path.exists():
-            errors_parse.append((idx, paper_id, "pdf_not_downloaded"))
-            continue
+    # Optionally restrict to a batch (useful for debugging or chunked runs)
+    if cfg.batch_size is not None:
+        start, end = cfg.batch_start, cfg.batch_start + cfg.batch_size
+        total_rows = max(0, min(end, total_rows) - start)
+        print(f"Processing batch rows [{start}:{end}] (total {total_rows})")
+
+    # Resumed runs: one directory scan instead of stat calls per row. Cached
+    # TEI files are checked for truncation on the first run over this folder.
+    verify_tei = cfg.verify_tei or not TEI_VERIFIED_MARKER.exists()
+    done = scan_completed(verify_tei=verify_tei)
+    if verify_tei:
+        TEI_VERIFIED_MARKER.touch()
+    print(f"Already on disk: {len(done.pdf)} PDFs, {len(done.tei)} TEI files")
+
+    # Targeted re-runs: don't resend papers whose last parse error was permanent
+    error_log_path = OUTPUT_ROOT / error_log_name(cfg)
+    permanent_errors = (
+        {} if cfg.grobid_retry_all else load_permanent_parse_errors(error_log_path)
+    )
+    if permanent_errors:
+        print(
+            f"Skipping Grobid for {len(permanent_errors)} papers with permanent "
+            "errors in the previous run (set GROBID_RETRY_ALL=1 to retry them)"
+        )
+
+    # Download and Grobid stages run concurrently: downloader threads put
+    # rows onto a bounded queue as soon as their PDF is on disk, and Grobid
+    # consumer threads parse them, so neither the network nor the Grobid
+    # server sits idle waiting for the other pass to finish.
+    print(f"Download workers: {cfg.dl_workers} (max {cfg.dl_per_host} per host)")
+    warm_connections(session, itertools.islice(_iter_rows(cfg), _WARMUP_ROWS))
+    pdf_queue: queue.Queue[_PipelineItem] = queue.Queue(maxsize=cfg.queue_size)
+    stop = threading.Event()
+
+    with (
+        tqdm(
+            total=total_rows, desc="Downloading PDFs", position=0, **_PBAR_OPTIONS
+        ) as dl_pbar,
+        tqdm(
+            total=total_rows,
+            desc="Parsing PDFs with Grobid",
+            position=1,
+            **_PBAR_OPTIONS,
+        ) as parse_pbar,
+        ThreadPoolExecutor(max_workers=cfg.grobid_workers) as parse_ex,
+    ):
+        consumers = [
+            parse_ex.submit(
+                _grobid_consumer,
+                session,
+                cfg,
+                pdf_queue,
+                done,
+                permanent_errors,
+                errors_parse,
+                parse_pbar,
+                stop,
+            )
+            for _ in range(cfg.grobid_workers)
+        ]
 
         try:
-            if not tei_path.exists():
-                grobid_process_fulltext(pdf_path, tei_path)
-                if GROBID_SLEEP > 0:
-                    time.sleep(GROBID_SLEEP)
-
-            if not meta_path.exists():
-                meta = {
-                    "paper_id": paper_id,
-                    "forum": forum,
-                    "title": safe_title(title),
-                    "pdf_url": pdf_url,
-                }
-                with open(meta_path, "w", encoding="utf-8") as f:
-                    json.dump(meta, f, ensure_ascii=False, indent=2)
-        except Exception as e:  # noqa: BLE001
-            errors_parse.append((idx, paper_id, repr(e)))
+            with ThreadPoolExecutor(max_workers=cfg.dl_workers) as dl_ex:
+                # Only a small window of rows is submitted at a time, so rows
+                # are read from the CSV as workers free up instead of every
+                # row (plus its Future) sitting in the executor's queue.
+                window = 2 * cfg.dl_workers
+                pending: dict[Future, int] = {}
+                try:
+                    for idx, row in enumerate(_iter_rows(cfg), start=1):
+                        if len(pending) >= window:
+                            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                            for fut in finished:
+                                _record_download(
+                                    fut, pending, errors_download, dl_pbar
+                                )
+                        fut = dl_ex.submit(
+                            _download_stage, session, cfg, idx, row, done, pdf_queue
+                        )
+                        pending[fut] = idx
+                    for fut in as_completed(list(pending)):
+                        _record_download(fut, pending, errors_download, dl_pbar)
+                except BaseException:
+                    # Ctrl-C (or any failure here): drop queued downloads and
+                    # let only the in-flight ones finish, rather than waiting
+                    # on the rest of the window in the executor's shutdown.
+                    stop.set()
+                    dl_ex.shutdown(wait=False, cancel_futures=True)
+                    raise
+        finally:
+            for _ in range(cfg.grobid_workers):
+                pdf_queue.put(_END_OF_ROWS)
+
+        # Surface anything that escaped a consumer instead of losing it
+        for consumer in consumers:
+            consumer.result()
+
+    errors_download.sort(key=lambda e: e[0])
+    errors_parse.sort(key=lambda e: e[0])
 
-    total_rows = len(rows)
     print(f"\nDone. Total rows: {total_rows}")
     print(f"Download errors: {len(errors_download)}")
     print(f"Parse errors: {len(errors_parse)}")
 
     if errors_download or errors_parse:
-        error_log_path = OUTPUT_ROOT / "grobid_errors.json"
-        with open(error_log_path, "w", encoding="utf-8") as f:
-            json.dump(
-                {
-                    "download_errors": errors_download,
-                    "parse_errors": errors_parse,
-                },
-                f,
-                ensure_ascii=False,
-                indent=2,
-            )
+        write_json(
+            error_log_path,
+            {
+                "download_errors": errors_download,
+                "parse_errors": errors_parse,
+            },
+        )
         print(f"Error details written to: {error_log_path}")
 
 
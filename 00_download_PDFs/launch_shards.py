@@ -0,0 +1,108 @@
+"""
+Run 01_get_and_parse_PDF.py as several parallel shards, one per Grobid server.
+
+The CSV is split into equally sized, disjoint row ranges. Each shard is a
+separate process running the normal script with GROBID_BATCH_START /
+GROBID_BATCH_SIZE set to its range and GROBID_URL set to its own server, so
+several Grobid containers (or a load balancer in front of them) can be kept
+busy at once.
+
+Usage (from repo root, with one Grobid server per URL):
+
+    conda activate llm-abm
+    GROBID_URLS=http://localhost:8070,http://localhost:8071 \\
+        python 00_download_PDFs/launch_shards.py
+
+Every shard runs its own download pool against the same PDF host, so lower
+DL_PER_HOST accordingly if needed. Shard output goes to
+ICLR2025_papers/shard_<i>.log.
+"""
+
+import csv
+import math
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+
+GROBID_URL = os.environ.get("GROBID_URL", "http://localhost:8070")
+# Comma-separated Grobid servers; one shard is launched per URL. An empty
+# or blank GROBID_URLS falls back to the single GROBID_URL server.
+GROBID_URLS = [
+    url.strip()
+    for url in os.environ.get("GROBID_URLS", GROBID_URL).split(",")
+    if url.strip()
+] or [GROBID_URL]
+
+THIS_DIR = Path(__file__).resolve().parent
+REPO_ROOT = THIS_DIR.parent
+
+SCRIPT_PATH = THIS_DIR / "01_get_and_parse_PDF.py"
+CSV_PATH = THIS_DIR / "2025_iclr_pdfs_urls.csv"
+OUTPUT_ROOT = REPO_ROOT / "ICLR2025_papers"
+
+
+def count_rows() -> int:
+    """
+    Count data rows in the CSV.
+
+    Keep in sync with _count_rows() in 01_get_and_parse_PDF.py: shard
+    boundaries only line up with the script's GROBID_BATCH_START /
+    GROBID_BATCH_SIZE slicing if both count rows the same way.
+    """
+    with open(CSV_PATH, newline="", encoding="utf-8") as f:
+        return max(0, sum(1 for _ in csv.reader(f)) - 1)
+
+
+def start_shard(shard: int, start: int, size: int, grobid_url: str) -> subprocess.Popen:
+    """Launch one copy of the main script over rows [start:start + size]."""
+    env = dict(
+        os.environ,
+        GROBID_URL=grobid_url,
+        GROBID_BATCH_START=str(start),
+        GROBID_BATCH_SIZE=str(size),
+    )
+    log_path = OUTPUT_ROOT / f"shard_{shard}.log"
+    with open(log_path, "w", encoding="utf-8") as log_f:
+        # The child keeps its own handle on the log file
+        return subprocess.Popen(
+            [sys.executable, str(SCRIPT_PATH)],
+            env=env,
+            stdout=log_f,
+            stderr=subprocess.STDOUT,
+        )
+
+
+def main() -> None:
+    if not CSV_PATH.exists():
+        raise FileNotFoundError(f"CSV not found at {CSV_PATH}")
+
+    OUTPUT_ROOT.mkdir(parents=True, exist_ok=True)
+
+    total_rows = count_rows()
+    chunk = math.ceil(total_rows / len(GROBID_URLS))
+    print(f"Splitting {total_rows} rows into {len(GROBID_URLS)} shards of {chunk}")
+
+    procs: list[tuple[int, str, subprocess.Popen]] = []
+    for shard, grobid_url in enumerate(GROBID_URLS):
+        start = shard * chunk
+        if start >= total_rows:
+            break
+        print(f"Shard {shard}: rows [{start}:{start + chunk}] -> {grobid_url}")
+        procs.append((shard, grobid_url, start_shard(shard, start, chunk, grobid_url)))
+
+    failed = []
+    for shard, grobid_url, proc in procs:
+        if proc.wait() != 0:
+            failed.append(shard)
+            print(f"Shard {shard} ({grobid_url}) exited with code {proc.returncode}")
+
+    print(f"\nDone. Shards run: {len(procs)}, failed: {len(failed)}")
+    print(f"Shard logs and per-shard error files are under: {OUTPUT_ROOT}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()